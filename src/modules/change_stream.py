@@ -0,0 +1,188 @@
+# src/modules/change_stream.py
+import sys
+import threading
+from collections import OrderedDict, deque
+
+
+class LocalStreamSource:
+    """Sustituto en memoria de DynamoDB Streams (para pruebas y desarrollo).
+
+    Otro proceso/herramienta "escribe" llamando a put_record(); el consumidor
+    lee con read() igual que con la fuente real.
+    """
+
+    def __init__(self):
+        self._records = deque()
+        self._lock = threading.Lock()
+
+    def put_record(self, item, event_name="MODIFY"):
+        with self._lock:
+            self._records.append({"event": event_name, "item": dict(item)})
+
+    def read(self):
+        with self._lock:
+            records = list(self._records)
+            self._records.clear()
+        return records
+
+
+class DynamoDBStreamSource:
+    """Lee un stream compatible con DynamoDB Streams (NEW_IMAGE o NEW_AND_OLD_IMAGES)."""
+
+    def __init__(self, stream_arn, region_name='us-east-1'):
+        # Import diferido: boto3 solo hace falta si se usa el stream
+        import boto3
+        from boto3.dynamodb.types import TypeDeserializer
+        self.stream_arn = stream_arn
+        self._client = boto3.client('dynamodbstreams', region_name=region_name)
+        self._deserializer = TypeDeserializer()
+        self._iterators = {}  # shard_id -> shard iterator
+        self._last_seq = {}   # shard_id -> último SequenceNumber entregado
+        self._started = False
+
+    def _shard_iterator(self, shard_id, iterator_type, sequence_number=None):
+        kwargs = {'SequenceNumber': sequence_number} if sequence_number else {}
+        return self._client.get_shard_iterator(
+            StreamArn=self.stream_arn, ShardId=shard_id,
+            ShardIteratorType=iterator_type, **kwargs)['ShardIterator']
+
+    def _refresh_shards(self):
+        # Los shards que ya existen al arrancar se leen desde ahora (LATEST);
+        # los que aparecen después (shards hijos) desde su inicio (TRIM_HORIZON)
+        # para no perder lo escrito antes de descubrirlos.
+        iterator_type = 'TRIM_HORIZON' if self._started else 'LATEST'
+        kwargs = {}
+        while True:
+            desc = self._client.describe_stream(StreamArn=self.stream_arn, **kwargs)['StreamDescription']
+            for shard in desc['Shards']:
+                shard_id = shard['ShardId']
+                if shard_id not in self._iterators:
+                    self._iterators[shard_id] = self._shard_iterator(shard_id, iterator_type)
+            last_shard = desc.get('LastEvaluatedShardId')
+            if not last_shard:
+                break
+            kwargs = {'ExclusiveStartShardId': last_shard}
+        self._started = True
+
+    def _read_shard(self, shard_id, iterator):
+        """Lee un shard. El iterador avanza solo si los registros se pudieron procesar."""
+        response = self._client.get_records(ShardIterator=iterator, Limit=100)
+        records = []
+        for record in response['Records']:
+            image = record['dynamodb'].get('NewImage') or record['dynamodb'].get('Keys', {})
+            records.append({
+                "event": record['eventName'],
+                "item": {k: self._deserializer.deserialize(v) for k, v in image.items()},
+            })
+        self._iterators[shard_id] = response.get('NextShardIterator')
+        if response['Records']:
+            self._last_seq[shard_id] = response['Records'][-1]['dynamodb']['SequenceNumber']
+        return records
+
+    def read(self):
+        self._refresh_shards()
+        records = []
+        for shard_id, iterator in list(self._iterators.items()):
+            if iterator is None:
+                continue  # Shard cerrado y ya consumido
+            try:
+                records.extend(self._read_shard(shard_id, iterator))
+            except Exception as e:
+                # Un shard con error no descarta lo ya leído de los demás
+                print(f"STREAM: Error leyendo shard {shard_id}: {e}", file=sys.stderr)
+                code = getattr(e, 'response', {}).get('Error', {}).get('Code')
+                if code == 'ExpiredIteratorException':
+                    self._renew_iterator(shard_id)
+        return records
+
+    def _renew_iterator(self, shard_id):
+        """Iterador vencido: se retoma justo después del último registro entregado."""
+        try:
+            last_seq = self._last_seq.get(shard_id)
+            if last_seq:
+                self._iterators[shard_id] = self._shard_iterator(
+                    shard_id, 'AFTER_SEQUENCE_NUMBER', last_seq)
+            else:
+                self._iterators[shard_id] = self._shard_iterator(shard_id, 'TRIM_HORIZON')
+        except Exception as e:
+            print(f"STREAM: No se pudo renovar el iterador de {shard_id}: {e}", file=sys.stderr)
+
+
+class ChangeStreamConsumer:
+    """Publica en el Subject los cambios hechos fuera de este servidor.
+
+    Los eventos que este mismo proceso ya notificó (registrados con
+    remember()) se descartan usando la clave (id, version). Un registro sin
+    'version' (escrito por otra herramienta) nunca se considera duplicado.
+    """
+
+    def __init__(self, source, subject, encoder_class, poll_interval=1.0, dedup_size=10000):
+        self.source = source
+        self.subject = subject
+        self.encoder_class = encoder_class
+        self.poll_interval = poll_interval
+        self._seen = OrderedDict()
+        self._dedup_size = dedup_size
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _key(item):
+        if item.get('version') is None:
+            return None
+        return (str(item.get('id')), str(item.get('version')))
+
+    def remember(self, item):
+        """Marca un ítem como ya notificado localmente."""
+        key = self._key(item)
+        if key is None:
+            return
+        with self._lock:
+            self._seen[key] = True
+            self._seen.move_to_end(key)
+            while len(self._seen) > self._dedup_size:
+                self._seen.popitem(last=False)
+
+    def _is_duplicate(self, item):
+        key = self._key(item)
+        if key is None:
+            return False
+        with self._lock:
+            return key in self._seen
+
+    def poll_once(self):
+        """Lee la fuente una vez y notifica los cambios externos. Devuelve cuántos publicó."""
+        published = 0
+        for record in self.source.read():
+            item = record["item"]
+            if record["event"] == "REMOVE":
+                # Este servidor nunca borra: un REMOVE siempre es externo
+                action = "delete"
+            elif self._is_duplicate(item):
+                continue
+            else:
+                # Solo se recuerdan los cambios locales (ver remember()): cada
+                # escritura externa llega una vez por el stream
+                action = "set"
+            self.subject.notify({"action": action, "data": item}, self.encoder_class)
+            published += 1
+        return published
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"STREAM: Error leyendo cambios: {e}", file=sys.stderr)
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="change-stream", daemon=True)
+        self._thread.start()
+        print("STREAM: Consumidor de cambios iniciado.")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval + 1)
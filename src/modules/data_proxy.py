@@ -7,6 +7,7 @@ from datetime import datetime, timezone
 from decimal import Decimal
 from botocore.exceptions import ClientError
 from modules.db_singleton import DatabaseSingleton
+from modules.tracing import tracer
 
 
 class DataProxy:
@@ -32,7 +33,8 @@ class DataProxy:
                 'action': action,
                 'details': details
             }
-            self.table_log.put_item(Item=item)
+            with tracer.span("audit.put_item"):
+                self.table_log.put_item(Item=item)
             print(f"AUDITORÍA: Acción '{action}' registrada.")
         except Exception as e:
             print(f"Error al registrar log: {e}", file=sys.stderr)
@@ -40,26 +42,134 @@ class DataProxy:
     def get_item(self, item_id, client_uuid, session_id):
         self._log_action(client_uuid, session_id, "get", f"ID: {item_id}")
         try:
-            response = self.table_data.get_item(Key={'id': item_id})
+            with tracer.span("data.get_item"):
+                response = self.table_data.get_item(Key={'id': item_id})
             return (response['Item'], 200) if 'Item' in response else ({"error": "Missing ID"}, 404)
         except ClientError as e:
             return {"error": e.response['Error']['Message']}, 500
 
-    def set_item(self, item_data, client_uuid, session_id):
+    @staticmethod
+    def _to_dynamo(data):
+        # DynamoDB no acepta float: se convierte todo número real a Decimal
+        with tracer.span("json.decimal_roundtrip"):
+            return json.loads(json.dumps(data), parse_float=Decimal)
+
+    @staticmethod
+    def _parse_version(item_data):
+        """Devuelve la versión esperada enviada por el cliente (o None)."""
+        if item_data.get('version') is None:
+            return None
+        version = int(item_data['version'])
+        if version < 0:
+            raise ValueError("version debe ser >= 0")
+        return version
+
+    def _update(self, item_id, fields, expected_version):
+        """UpdateItem: modifica solo 'fields' e incrementa la versión de forma atómica."""
+        names, values, sets = {'#v': 'version'}, {':one': 1, ':zero': 0}, []
+        for i, (name, value) in enumerate(fields.items()):
+            names[f'#f{i}'] = name
+            values[f':f{i}'] = value
+            sets.append(f'#f{i} = :f{i}')
+        sets.append('#v = if_not_exists(#v, :zero) + :one')
+        kwargs = {}
+        if expected_version == 0:
+            kwargs['ConditionExpression'] = 'attribute_not_exists(#v)'
+        elif expected_version is not None:
+            # Escritura condicional: falla si otro cliente escribió antes
+            values[':expected'] = expected_version
+            kwargs['ConditionExpression'] = '#v = :expected'
+        with tracer.span("data.update_item"):
+            response = self.table_data.update_item(
+                Key={'id': item_id},
+                UpdateExpression='SET ' + ', '.join(sets),
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+                ReturnValues='ALL_NEW',
+                **kwargs
+            )
+        return response['Attributes']
+
+    @staticmethod
+    def _conflict(item_id, expected_version):
+        return {"error": "Version conflict", "id": item_id,
+                "version": expected_version}, 409
+
+    def _put_versioned(self, item, expected_version):
+        """put_item que reemplaza el registro completo solo si la versión actual
+        es 'expected_version' (0 = no existe o no tiene versión)."""
+        item['version'] = expected_version + 1
+        if expected_version == 0:
+            kwargs = {'ConditionExpression': 'attribute_not_exists(#v)'}
+        else:
+            kwargs = {'ConditionExpression': '#v = :expected',
+                      'ExpressionAttributeValues': {':expected': expected_version}}
+        with tracer.span("data.put_item"):
+            self.table_data.put_item(Item=item,
+                                     ExpressionAttributeNames={'#v': 'version'},
+                                     **kwargs)
+        return item
+
+    def _current_version(self, item_id):
+        with tracer.span("data.get_version"):
+            response = self.table_data.get_item(
+                Key={'id': item_id}, ProjectionExpression='#v',
+                ExpressionAttributeNames={'#v': 'version'}, ConsistentRead=True)
+        return int(response.get('Item', {}).get('version', 0))
+
+    def set_item(self, item_data, client_uuid, session_id, max_retries=5):
         self._log_action(client_uuid, session_id, "set",
                          f"ID: {item_data.get('id')}")
+        expected_version = None
         try:
-            item_data_decimal = json.loads(
-                json.dumps(item_data), parse_float=Decimal)
-            self.table_data.put_item(Item=item_data_decimal)
-            return item_data, 200
+            expected_version = self._parse_version(item_data)
+            item_data_decimal = self._to_dynamo(item_data)
+            if expected_version is not None:
+                # Con versión: reemplazo completo condicionado a la versión leída
+                return self._put_versioned(item_data_decimal, expected_version), 200
+
+            # Sin versión: igual que antes, el registro se reemplaza completo
+            # y gana la última escritura. Para que la versión siga creciendo se
+            # lee la actual y se reintenta si otro cliente escribió en el medio.
+            # (Los clientes que envían 'version' no pagan esta lectura.)
+            for attempt in range(max_retries):
+                current = self._current_version(item_data.get('id'))
+                try:
+                    return self._put_versioned(dict(item_data_decimal), current), 200
+                except ClientError as e:
+                    if (e.response['Error']['Code'] != 'ConditionalCheckFailedException'
+                            or attempt == max_retries - 1):
+                        raise
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return self._conflict(item_data.get('id'), expected_version)
+            return {"error": e.response['Error']['Message']}, 500
+        except Exception as e:
+            return {"error": str(e)}, 400
+
+    def update_item(self, item_data, client_uuid, session_id):
+        item_id = item_data.get('id') or item_data.get('ID')
+        self._log_action(client_uuid, session_id, "update", f"ID: {item_id}")
+        try:
+            expected_version = self._parse_version(item_data)
+            # Solo se envían los campos a modificar, no el registro completo
+            fields = {k: v for k, v in self._to_dynamo(item_data).items()
+                      if k not in ('id', 'ID', 'ACTION', 'UUID', 'version')}
+            if not fields:
+                return {"error": "Nothing to update"}, 400
+            return self._update(item_id, fields, expected_version), 200
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return self._conflict(item_id, expected_version)
+            return {"error": e.response['Error']['Message']}, 500
         except Exception as e:
             return {"error": str(e)}, 400
 
     def list_items(self, client_uuid, session_id):
         self._log_action(client_uuid, session_id, "list")
         try:
-            response = self.table_data.scan()
+            with tracer.span("data.scan"):
+                response = self.table_data.scan()
             return (response['Items'], 200) if 'Items' in response else ([], 200)
         except ClientError as e:
             return {"error": e.response['Error']['Message']}, 500
@@ -69,7 +179,8 @@ class DataProxy:
         self._log_action(client_uuid, session_id, "listlog")
         try:
             # ACCIÓN REAL: Escanea la tabla CorporateLog
-            response = self.table_log.scan()
+            with tracer.span("log.scan"):
+                response = self.table_log.scan()
             # Devuelve los ítems de la tabla CorporateLog
             return (response['Items'], 200) if 'Items' in response else ([], 200)
         except ClientError as e:
@@ -1,7 +1,8 @@
 # src/modules/db_singleton.py
-import boto3
-import botocore
 import sys
+from concurrent.futures import ThreadPoolExecutor
+
+TABLE_NAMES = ('CorporateData', 'CorporateLog')
 
 
 class DatabaseSingleton:
@@ -22,12 +23,16 @@ class DatabaseSingleton:
 
         print("Inicializando conexión a DynamoDB...")
         try:
+            # Import diferido: boto3 tarda en importarse y solo se necesita acá
+            import boto3
             # --- CORRECCIÓN: Se fija la región AWS para consistencia ---
             self.dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-            self.table_corporate_data = self.dynamodb.Table('CorporateData')
-            self.table_corporate_log = self.dynamodb.Table('CorporateLog')
-            self.table_corporate_data.load()
-            self.table_corporate_log.load()
+            self.table_corporate_data = self.dynamodb.Table(TABLE_NAMES[0])
+            self.table_corporate_log = self.dynamodb.Table(TABLE_NAMES[1])
+            # Se verifican ambas tablas en paralelo (el cliente es thread-safe)
+            client = self.dynamodb.meta.client
+            with ThreadPoolExecutor(max_workers=len(TABLE_NAMES)) as pool:
+                list(pool.map(lambda name: client.describe_table(TableName=name), TABLE_NAMES))
             print("Tablas 'CorporateData' y 'CorporateLog' cargadas.")
             self._initialized = True
         except Exception as e:
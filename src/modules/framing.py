@@ -0,0 +1,73 @@
+# src/modules/framing.py
+# Lectura de sockets con un buffer reutilizable (recv_into + memoryview),
+# sin concatenar bytes por cada chunk recibido.
+
+
+class FrameReader:
+    """Separa mensajes delimitados por '\\n' (NDJSON) que llegan por un socket.
+
+    Un mensaje puede llegar partido en varios recv o varios mensajes juntos
+    en uno solo; read_frame() siempre devuelve exactamente un mensaje.
+    """
+
+    def __init__(self, sock, bufsize=65536):
+        self._sock = sock
+        self._buf = bytearray(bufsize)
+        self._start = 0  # Inicio del mensaje pendiente
+        self._end = 0    # Fin de los datos válidos en el buffer
+        self._scan = 0   # Hasta dónde ya se buscó el delimitador
+
+    def _fill(self):
+        if self._end == len(self._buf):
+            if self._start > 0:
+                # Se compacta: el mensaje pendiente pasa al principio
+                pending = self._end - self._start
+                self._buf[:pending] = self._buf[self._start:self._end]
+                self._scan -= self._start
+                self._start, self._end = 0, pending
+            else:
+                # Un solo mensaje más grande que el buffer: se duplica
+                self._buf.extend(bytes(len(self._buf)))
+        with memoryview(self._buf) as view:
+            received = self._sock.recv_into(view[self._end:])
+        if not received:
+            raise ConnectionError("Servidor cerró la conexión.")
+        self._end += received
+
+    def read_frame(self):
+        """Devuelve el próximo mensaje (bytes, sin el '\\n')."""
+        while True:
+            index = self._buf.find(b"\n", self._scan, self._end)
+            if index < 0:
+                self._scan = self._end
+                self._fill()
+                continue
+            # Una sola copia: la vista se libera antes de que _fill() redimensione
+            with memoryview(self._buf) as view:
+                frame = bytes(view[self._start:index])
+            self._start = self._scan = index + 1
+            if self._start == self._end:
+                self._start = self._end = self._scan = 0
+            if frame.strip():
+                return frame
+
+    def __iter__(self):
+        while True:
+            yield self.read_frame()
+
+
+def recv_until_close(sock, write, bufsize=65536):
+    """Lee hasta que el servidor cierra, pasando cada chunk a write().
+
+    write recibe un memoryview del buffer (válido solo durante la llamada),
+    por ejemplo file.write o bytearray.extend. Devuelve el total de bytes.
+    """
+    buf = bytearray(bufsize)
+    total = 0
+    with memoryview(buf) as view:
+        while True:
+            received = sock.recv_into(view)
+            if not received:
+                return total
+            write(view[:received])
+            total += received
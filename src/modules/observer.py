@@ -1,38 +1,239 @@
 # src/modules/observer.py
-import threading, json, socket
+import threading, json, socket, time
+from datetime import datetime, timezone
+from modules.tracing import tracer
+
+
+class Subscriber:
+    """Estado de un suscriptor. __slots__ para que miles de conexiones ocupen poco."""
+    __slots__ = ('sock', 'uuid', 'filters', 'connected_at', 'sent', 'errors',
+                 'throttled', 'tokens', 'last_refill', 'backlog', 'lock')
+
+    def __init__(self, sock, client_uuid, filters=None):
+        self.sock = sock
+        self.uuid = client_uuid
+        self.filters = frozenset(filters) if filters else None  # ids de interés (None = todos)
+        self.connected_at = time.time()
+        # sent/errors: mensajes enviados/fallidos; throttled: cambios retenidos por max_rate
+        self.sent = self.errors = self.throttled = 0
+        self.tokens, self.last_refill = 1.0, time.monotonic()
+        self.backlog = {}  # id -> data pendiente por el límite de tasa (modo batch)
+        self.lock = threading.Lock()  # Serializa los envíos a este socket
+
+    def wants(self, item_id):
+        return self.filters is None or item_id in self.filters
+
+
+class SubscriberRegistry:
+    """Suscriptores indexados por conexión, repartidos en shards con lock propio.
+
+    Alta, baja y búsqueda son O(1) y solo bloquean un shard, así que la
+    entrada y salida masiva de observadores no compite por un lock global.
+    """
+
+    def __init__(self, shards=16):
+        self._shards = [({}, threading.Lock()) for _ in range(shards)]
+
+    def _shard(self, sock):
+        return self._shards[(id(sock) >> 4) % len(self._shards)]
+
+    def add(self, subscriber):
+        records, lock = self._shard(subscriber.sock)
+        with lock:
+            if subscriber.sock in records:
+                return False
+            records[subscriber.sock] = subscriber
+            return True
+
+    def remove(self, sock):
+        records, lock = self._shard(sock)
+        with lock:
+            return records.pop(sock, None)
+
+    def snapshot(self):
+        """Copia de los suscriptores actuales (cada shard se bloquea por separado)."""
+        subscribers = []
+        for records, lock in self._shards:
+            with lock:
+                subscribers.extend(records.values())
+        return subscribers
+
+    def __len__(self):
+        return sum(len(records) for records, _ in self._shards)
+
+    def stats(self):
+        """Cantidad total, por shard y contadores agrupados por UUID."""
+        by_uuid = {}
+        for sub in self.snapshot():
+            entry = by_uuid.setdefault(str(sub.uuid), {
+                "connections": 0, "sent": 0, "errors": 0, "throttled": 0,
+                "backlog": 0, "connected_since": sub.connected_at})
+            entry["connections"] += 1
+            entry["sent"] += sub.sent
+            entry["errors"] += sub.errors
+            entry["throttled"] += sub.throttled
+            entry["backlog"] += len(sub.backlog)
+            entry["connected_since"] = min(entry["connected_since"], sub.connected_at)
+        for entry in by_uuid.values():
+            entry["connected_since"] = datetime.fromtimestamp(
+                entry["connected_since"], timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        return {"total": sum(e["connections"] for e in by_uuid.values()),
+                "shards": [len(records) for records, _ in self._shards],
+                "by_uuid": by_uuid}
+
 
 class Subject:
-    def __init__(self):
-        self._observers = []
-        self._lock = threading.Lock()
-        print("Subject (Observer) inicializado.")
+    """Notifica cambios a los suscriptores.
 
-    def subscribe(self, client_socket, client_uuid):
-        with self._lock:
-            if client_socket not in self._observers:
-                self._observers.append(client_socket)
-                print(f"OBSERVER: Nuevo suscriptor (UUID: {client_uuid}). Total: {len(self._observers)}")
+    Por defecto cada notify() envía un mensaje a cada suscriptor. Con
+    batch_window (segundos) los cambios se acumulan durante la ventana, se
+    conserva solo la versión más nueva de cada 'id' y se envía un único
+    evento "batch" por suscriptor. En ese modo max_rate limita los mensajes
+    por segundo de cada suscriptor; lo que no se puede enviar se sigue
+    fusionando hasta la próxima ventana (consistencia eventual).
+    """
+
+    def __init__(self, batch_window=None, max_rate=None, shards=16):
+        self.registry = SubscriberRegistry(shards)
+        self._lock = threading.Lock()  # Solo protege self._pending
+        # Una ventana <= 0 haría girar el hilo de batch sin pausa: se ignora
+        self.batch_window = batch_window if batch_window and batch_window > 0 else None
+        self.max_rate = max_rate
+        self._pending = {}      # id -> data (modo batch)
+        self._encoder_class = None
+        self._stop = threading.Event()
+        if self.batch_window:
+            threading.Thread(target=self._flush_loop, name="observer-batch", daemon=True).start()
+            print(f"Subject (Observer) inicializado en modo batch ({self.batch_window * 1000:.0f} ms, max_rate={max_rate}).")
+        else:
+            print("Subject (Observer) inicializado.")
+
+    def subscribe(self, client_socket, client_uuid, filters=None):
+        if self.registry.add(Subscriber(client_socket, client_uuid, filters)):
+            print(f"OBSERVER: Nuevo suscriptor (UUID: {client_uuid}). Total: {len(self.registry)}")
 
     def unsubscribe(self, client_socket):
-        with self._lock:
-            if client_socket in self._observers:
-                try:
-                    self._observers.remove(client_socket)
-                    print(f"OBSERVER: Suscriptor desconectado. Total: {len(self._observers)}")
-                except ValueError:
-                    pass # Ya fue removido por otro hilo
+        if self.registry.remove(client_socket) is not None:
+            print(f"OBSERVER: Suscriptor desconectado. Total: {len(self.registry)}")
+
+    def stats(self):
+        return self.registry.stats()
+
+    def _send(self, sub, message_bytes):
+        # Requiere sub.lock tomado. False si el suscriptor se cayó.
+        try:
+            sub.sock.sendall(message_bytes)
+            sub.sent += 1
+            return True
+        except socket.error as e:
+            sub.errors += 1
+            print(f"OBSERVER: Error enviando a un suscriptor ({e}). Eliminándolo.")
+            self.unsubscribe(sub.sock)
+            return False
 
     def notify(self, data, encoder_class):
+        if self.batch_window:
+            return self._enqueue(data, encoder_class)
+
+        with tracer.span("notify"):
+            subscribers = self.registry.snapshot()
+            if not subscribers:
+                return
+
+            print(f"OBSERVER: Notificando a {len(subscribers)} suscriptor(es)...")
+            # '\n' delimita cada notificación (NDJSON) para que el cliente pueda separarlas
+            message_bytes = json.dumps({"EVENT": "update", "DATA": data}, cls=encoder_class).encode('utf-8') + b"\n"
+
+            item_id = self._key(data)
+            for sub in subscribers:
+                if sub.wants(item_id):
+                    with sub.lock:
+                        self._send(sub, message_bytes)
+
+    # --- Modo batch ---
+
+    @staticmethod
+    def _key(data):
+        item = data.get("data") if isinstance(data.get("data"), dict) else data
+        return item.get("id")
+
+    @staticmethod
+    def _is_older(new, current):
+        """True si 'new' tiene una versión anterior a la ya pendiente."""
+        try:
+            return int(new["data"]["version"]) < int(current["data"]["version"])
+        except (KeyError, TypeError, ValueError):
+            return False # Sin versión: gana el último en llegar
+
+    @classmethod
+    def _merge(cls, pending, data):
+        key = cls._key(data)
+        current = pending.get(key)
+        if current is None or not cls._is_older(data, current):
+            pending.pop(key, None) # Reinsertar: el orden refleja el último cambio
+            pending[key] = data
+
+    def _enqueue(self, data, encoder_class):
+        if not len(self.registry):
+            return
         with self._lock:
-            if not self._observers:
+            self._encoder_class = encoder_class
+            self._merge(self._pending, data)
+
+    def _take_token(self, sub, now):
+        if not self.max_rate:
+            return True
+        # Token bucket de capacidad 1: como mucho max_rate mensajes por segundo
+        sub.tokens = min(1.0, sub.tokens + (now - sub.last_refill) * self.max_rate)
+        sub.last_refill = now
+        if sub.tokens < 1.0:
+            return False
+        sub.tokens -= 1.0
+        return True
+
+    def _encode_batch(self, pending):
+        return json.dumps({"EVENT": "batch", "DATA": list(pending.values())},
+                          cls=self._encoder_class).encode('utf-8') + b"\n"
+
+    def flush(self):
+        """Envía lo acumulado en la ventana. Lo llama el hilo de batch."""
+        with tracer.span("notify.batch"):
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            subscribers = self.registry.snapshot()
+            if not subscribers or not (batch or any(sub.backlog for sub in subscribers)):
                 return
-            
-            print(f"OBSERVER: Notificando a {len(self._observers)} suscriptor(es)...")
-            message_bytes = json.dumps({"EVENT": "update", "DATA": data}, cls=encoder_class).encode('utf-8')
-
-            for obs_socket in list(self._observers): # Iterar sobre una copia
-                try:
-                    obs_socket.sendall(message_bytes)
-                except socket.error as e:
-                    print(f"OBSERVER: Error enviando a un suscriptor ({e}). Eliminándolo.")
-                    self.unsubscribe(obs_socket)
\ No newline at end of file
+            shared_bytes = self._encode_batch(batch) if batch else None
+            now = time.monotonic()
+            sent = 0
+            for sub in subscribers:
+                with sub.lock:
+                    changes = batch if sub.filters is None else {
+                        k: v for k, v in batch.items() if k in sub.filters}
+                    if not changes and not sub.backlog:
+                        continue
+                    if not self._take_token(sub, now):
+                        sub.throttled += len(changes) # Cambios retenidos, no ventanas
+                        for data in changes.values():
+                            self._merge(sub.backlog, data)
+                        continue
+                    if sub.backlog or changes is not batch:
+                        # Pendientes por el límite de tasa o un filtro propio
+                        for data in changes.values():
+                            self._merge(sub.backlog, data)
+                        message_bytes, sub.backlog = self._encode_batch(sub.backlog), {}
+                    else:
+                        message_bytes = shared_bytes # Codificado una sola vez para todos
+                    sent += self._send(sub, message_bytes)
+            if sent:
+                print(f"OBSERVER: Lote de {len(batch)} cambio(s) enviado a {sent} suscriptor(es).")
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.batch_window):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"OBSERVER: Error en envío por lotes: {e}")
+
+    def close(self):
+        self._stop.set()
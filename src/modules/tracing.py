@@ -0,0 +1,158 @@
+# src/modules/tracing.py
+# Trazas por pedido y profiler por muestreo. Ambos están apagados por defecto
+# y se encienden en caliente con las acciones 'trace' y 'profile'.
+import os
+import sys
+import json
+import time
+import threading
+from collections import Counter
+
+
+class _NullSpan:
+    """Span que no hace nada: es lo único que se paga con la traza apagada."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'trace_id', 'start_ns')
+
+    def __init__(self, tracer, name, trace_id):
+        self.tracer, self.name, self.trace_id = tracer, name, trace_id
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer._record(self.name, self.trace_id, self.start_ns, time.perf_counter_ns())
+        return False
+
+
+class Tracer:
+    """Escribe spans en formato Chrome Trace Event (chrome://tracing, Perfetto).
+
+    El trace ID de cada pedido es su session_id, el mismo que queda en el
+    campo 'sessionid' de la auditoría en CorporateLog.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def enable(self, path):
+        with self._lock:
+            if self._file is None:
+                is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+                self._file = open(path, 'a')
+                if is_new:
+                    # El formato admite un arreglo sin cerrar: se puede seguir agregando
+                    self._file.write("[\n")
+                self.path = path
+            self.enabled = True
+        print(f"TRACE: Trazas activadas -> {path}")
+
+    def disable(self):
+        with self._lock:
+            self.enabled = False
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        print("TRACE: Trazas desactivadas.")
+
+    def begin(self, trace_id):
+        """Asocia el hilo actual a un pedido."""
+        self._local.trace_id = trace_id
+
+    def end(self):
+        self._local.trace_id = None
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, getattr(self._local, 'trace_id', None))
+
+    def _record(self, name, trace_id, start_ns, end_ns):
+        event = json.dumps({
+            "name": name, "cat": "request", "ph": "X",
+            "ts": start_ns / 1000, "dur": (end_ns - start_ns) / 1000,  # microsegundos
+            "pid": os.getpid(), "tid": threading.get_ident(),
+            "args": {"trace_id": trace_id},
+        })
+        with self._lock:
+            if self._file is not None:
+                self._file.write(event + ",\n")
+                self._file.flush()
+
+
+class SamplingProfiler:
+    """Muestrea las pilas de todos los hilos y las guarda en formato 'folded'
+    (una línea 'f1;f2;f3 N' por pila), el que leen flamegraph.pl y speedscope.
+
+    Se usa muestreo en vez de cProfile porque cProfile solo mide el hilo que
+    lo activa y cada pedido corre en su propio hilo.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self.running:
+            return False
+        self._stacks.clear()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        print("PROFILE: Profiler por muestreo activado.")
+        return True
+
+    def stop(self, path):
+        """Detiene el muestreo y escribe las pilas en 'path'. Devuelve cuántas muestras hubo."""
+        if not self.running:
+            return 0
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        with open(path, 'w') as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        samples = sum(self._stacks.values())
+        print(f"PROFILE: {samples} muestras guardadas en {path}")
+        return samples
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self._stacks[";".join(reversed(stack))] += 1
+
+
+# Instancias únicas compartidas por el servidor, el proxy y el observer
+tracer = Tracer()
+profiler = SamplingProfiler()
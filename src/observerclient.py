@@ -1,5 +1,6 @@
 # src/observerclient.py
 import socket, sys, argparse, json, uuid, time
+from modules.framing import FrameReader
 
 def get_cpu_id():
     return str(uuid.getnode())
@@ -17,25 +18,23 @@ def connect_and_listen(host, port, client_uuid, verbose):
                 if verbose: print("¡Conectado! Enviando suscripción...")
                 sock.sendall(request_json.encode('utf-8'))
 
-                response = json.loads(sock.recv(1024).decode('utf-8'))
+                # Cada mensaje del servidor termina en '\n' (NDJSON)
+                reader = FrameReader(sock)
+                response = json.loads(reader.read_frame())
                 if response.get("status") != "OK":
-                    print(f"Error de suscripción: {response.get('message')}. Reintentando...")
+                    print(f"Error de suscripción: {response.get('message') or response.get('error')}. Reintentando...")
                     time.sleep(retry_delay / 2)
                     continue
 
                 print(f"Suscripción exitosa (UUID: {client_uuid}). Escuchando...")
 
-                while True: # Bucle de escucha
-                    notification_raw = sock.recv(4096)
-                    if not notification_raw:
-                        raise ConnectionError("Servidor cerró la conexión.")
-                    
+                for notification_raw in reader: # Bucle de escucha (ConnectionError al cerrar)
                     print("\n--- NOTIFICACIÓN RECIBIDA ---")
                     try:
-                        parsed = json.loads(notification_raw.decode('utf-8'))
+                        parsed = json.loads(notification_raw)
                         print(json.dumps(parsed, indent=4))
                     except json.JSONDecodeError:
-                        print(notification_raw.decode('utf-8')) # Imprimir raw
+                        print(notification_raw.decode('utf-8', 'replace')) # Imprimir raw
                     print("-----------------------------")
 
         except (socket.error, ConnectionError, ConnectionResetError) as e:
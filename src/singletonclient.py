@@ -1,9 +1,138 @@
 # src/singletonclient.py
-import socket, sys, argparse, json, uuid
+import socket, sys, argparse, json, time
+from modules.framing import recv_until_close
 
 def get_cpu_id():
+    # Import diferido: uuid arrastra 'platform' y solo hace falta si no viene UUID
+    import uuid
     return str(uuid.getnode())
 
+def open_request(host, port, request_json):
+    """Un pedido = una conexión (así lo espera el servidor). Devuelve el socket listo para leer."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.connect((host, port))
+        sock.sendall(request_json.encode('utf-8'))
+    except socket.error:
+        sock.close()
+        raise
+    return sock
+
+def send_request(host, port, request_json):
+    """Envía el pedido y devuelve la respuesta completa (raw)."""
+    with open_request(host, port, request_json) as sock:
+        buffer = bytearray()
+        recv_until_close(sock, buffer.extend)
+        return buffer.decode('utf-8')
+
+def read_batch(path):
+    """Lee un arreglo JSON, un único objeto JSON o NDJSON (un pedido por línea).
+
+    Una línea NDJSON inválida no aborta el batch: queda como el error de
+    ese pedido y se informa en su resultado.
+    """
+    with open(path, 'r') as f:
+        content = f.read()
+    stripped = content.lstrip()
+    if stripped.startswith('['):
+        return json.loads(content)
+    if stripped.startswith('{'):
+        # Un objeto con formato (como los de data/*.json) es un solo pedido;
+        # si no se puede leer entero, es NDJSON
+        try:
+            return [json.loads(content)]
+        except json.JSONDecodeError:
+            pass
+    requests = []
+    for number, line in enumerate(content.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            requests.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            requests.append(ValueError(f"JSON inválido en la línea {number}: {e}"))
+    return requests
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("debe ser un entero >= 1")
+    return number
+
+def run_batch(args):
+    try:
+        requests = read_batch(args.input)
+    except Exception as e:
+        print(f"Error al leer el archivo de entrada '{args.input}': {e}", file=sys.stderr)
+        sys.exit(1)
+
+    cpu_id = None
+    for request_data in requests:
+        if isinstance(request_data, dict) and "UUID" not in request_data:
+            cpu_id = cpu_id or get_cpu_id()
+            request_data["UUID"] = cpu_id
+
+    def run_one(indexed):
+        index, request_data = indexed
+        start = time.perf_counter()
+        result = {"index": index, "ACTION": None}
+        try:
+            if isinstance(request_data, Exception):
+                raise request_data
+            if not isinstance(request_data, dict):
+                raise ValueError("el pedido debe ser un objeto JSON")
+            result["ACTION"] = request_data.get("ACTION")
+            raw = send_request(args.server, args.port, json.dumps(request_data))
+            try:
+                response = json.loads(raw)
+            except json.JSONDecodeError:
+                response = raw
+            failed = isinstance(response, dict) and "error" in response
+            result.update(status="ERROR" if failed else "OK", response=response)
+        except socket.error as e:
+            result.update(status="CONNECTION_ERROR", response={"error": str(e)})
+        except Exception as e:
+            # Cualquier otra falla queda en el resultado de ese pedido
+            result.update(status="ERROR", response={"error": str(e)})
+        result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+
+    # Import diferido: solo el modo batch usa hilos
+    from concurrent.futures import ThreadPoolExecutor
+    stats = {}
+    try:
+        out = open(args.output, 'w') if args.output else sys.stdout
+    except IOError as e:
+        print(f"Error al abrir el archivo de salida: {e}", file=sys.stderr)
+        sys.exit(1)
+    # Si los resultados van a stdout, progreso y resumen van a stderr
+    # para no romper el NDJSON
+    info = sys.stderr if out is sys.stdout else sys.stdout
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            # map() devuelve en orden de entrada aunque terminen desordenados
+            for result in pool.map(run_one, enumerate(requests)):
+                out.write(json.dumps(result) + "\n")
+                stats[result["status"]] = stats.get(result["status"], 0) + 1
+                if args.verbose:
+                    print(f"[{result['index']}] {result['status']} ({result['elapsed_ms']} ms)", file=info)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+
+    print("\n--- Resumen del Batch ---", file=info)
+    print(f"Pedidos: {len(requests)} en {elapsed:.2f} s ({len(requests) / elapsed if elapsed else 0:.1f} req/s)", file=info)
+    for status, count in sorted(stats.items()):
+        print(f"  {status}: {count}", file=info)
+    if args.output:
+        print(f"Respuestas guardadas en {args.output}", file=info)
+    print("-------------------------", file=info)
+    if stats.get("CONNECTION_ERROR"):
+        print(f"Error: No se pudo conectar a {args.server}:{args.port} en {stats['CONNECTION_ERROR']} pedido(s).", file=sys.stderr)
+        sys.exit(1)
+
 def main():
     parser = argparse.ArgumentParser(description="Cliente 'get/set/list' TPFI")
     parser.add_argument('-i', '--input', required=True, help='Archivo JSON de entrada.')
@@ -11,8 +140,13 @@ def main():
     parser.add_argument('-s', '--server', default='localhost', help='Host del servidor')
     parser.add_argument('-p', '--port', type=int, default=8080, help='Puerto del servidor')
     parser.add_argument('-v', '--verbose', action='store_true', help='Modo verboso')
+    parser.add_argument('-b', '--batch', action='store_true', help='Entrada con muchos pedidos (arreglo JSON, objeto JSON o NDJSON)')
+    parser.add_argument('-c', '--concurrency', type=positive_int, default=4, help='Conexiones simultáneas en modo batch')
     args = parser.parse_args()
 
+    if args.batch:
+        return run_batch(args)
+
     try:
         with open(args.input, 'r') as f:
             request_data = json.load(f)
@@ -22,43 +156,61 @@ def main():
 
     if "UUID" not in request_data:
         request_data["UUID"] = get_cpu_id()
-    
+
     request_json = json.dumps(request_data)
     if args.verbose:
         print(f"Conectando a {args.server}:{args.port} -> Enviando: {request_json}")
 
     try:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-            sock.connect((args.server, args.port))
-            sock.sendall(request_json.encode('utf-8'))
-            
-            buffer = b""
-            while True:
-                data_chunk = sock.recv(1024)
-                if not data_chunk:
-                    break
-                buffer += data_chunk
-            response_data = buffer.decode('utf-8')
-
+        sock = open_request(args.server, args.port, request_json)
     except socket.error as e:
         print(f"Error: No se pudo conectar a {args.server}:{args.port}. ¿Servidor caído?", file=sys.stderr)
         sys.exit(1)
 
-    if args.output:
-        try:
-            with open(args.output, 'w') as f:
-                f.write(response_data) # Guardar raw
+    with sock:
+        if args.output:
+            try:
+                f = open(args.output, 'wb')
+            except IOError as e:
+                print(f"Error al escribir en el archivo de salida: {e}", file=sys.stderr)
+                return
+            # socket.error e IOError son la misma clase (OSError): se marca
+            # cuándo falla la escritura para distinguirla de un corte de conexión
+            write_failed = []
+            def write(chunk):
+                try:
+                    f.write(chunk)
+                except IOError:
+                    write_failed.append(True)
+                    raise
+            with f:
+                try:
+                    # Se escribe a medida que llega: memoria constante aunque el 'list' sea enorme
+                    recv_until_close(sock, write) # Guardar raw
+                except IOError as e:
+                    if write_failed:
+                        print(f"Error al escribir en el archivo de salida: {e}", file=sys.stderr)
+                        return
+                    print(f"Error: Conexión interrumpida con {args.server}:{args.port} ({e}). "
+                          f"La salida en {args.output} quedó incompleta.", file=sys.stderr)
+                    sys.exit(1)
             print(f"Respuesta guardada en {args.output}")
-        except IOError as e:
-            print(f"Error al escribir en el archivo de salida: {e}", file=sys.stderr)
-    else:
-        print("\n--- Respuesta del Servidor ---")
+            return
+        buffer = bytearray()
         try:
-            # Intentar imprimirlo bonito
-            print(json.dumps(json.loads(response_data), indent=4))
-        except json.JSONDecodeError:
-            print(response_data) # Imprimir raw si no es JSON
-        print("------------------------------")
+            recv_until_close(sock, buffer.extend)
+        except socket.error as e:
+            print(f"Error: Conexión interrumpida con {args.server}:{args.port} ({e}).", file=sys.stderr)
+            sys.exit(1)
+        response_data = buffer.decode('utf-8')
+
+    print("\n--- Respuesta del Servidor ---")
+    try:
+        # Intentar imprimirlo bonito
+        print(json.dumps(json.loads(response_data), indent=4))
+    except json.JSONDecodeError:
+        print(response_data) # Imprimir raw si no es JSON
+    print("------------------------------")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
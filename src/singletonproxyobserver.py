@@ -6,9 +6,9 @@ import json
 import uuid
 import threading
 from decimal import Decimal
-from modules.db_singleton import DatabaseSingleton
-from modules.data_proxy import DataProxy
 from modules.observer import Subject
+from modules.change_stream import ChangeStreamConsumer, DynamoDBStreamSource
+from modules.tracing import tracer, profiler
 
 VERSION = "1.0-conciso"
 
@@ -19,18 +19,86 @@ class DecimalEncoder(json.JSONEncoder):
 
 
 class Server:
-    def __init__(self, host, port):
+    def __init__(self, host, port, stream_source=None, trace_file='trace.json',
+                 profile_file='profile.folded', batch_window=None, max_rate=None,
+                 stream_arn=None):
         self.host, self.port = host, port
+        self.trace_file, self.profile_file = trace_file, profile_file
         print("Inicializando componentes del servidor...")
-        self.data_proxy = DataProxy()
-        self.subject = Subject()
+        # El backend (boto3 + tablas) se inicializa en segundo plano al arrancar
+        self.data_proxy = None
+        self._backend_ready = threading.Event()
+        self._startup_error = None
+        self.subject = Subject(batch_window, max_rate)
+        # Opcional: cambios hechos por otros servidores/herramientas. Con
+        # stream_arn la fuente real (boto3) se crea en el warm-up, no antes del bind.
+        self.stream_arn = stream_arn
+        self.change_stream = ChangeStreamConsumer(
+            stream_source, self.subject, DecimalEncoder) if stream_source else None
         print("--- Servidor listo para escuchar ---")
 
-    def _send_response(self, conn, data, status_code=200):
-        """Helper para enviar respuestas JSON."""
+    def _warm_up(self):
+        """Inicializa DataProxy mientras el socket ya acepta conexiones."""
+        try:
+            # Import diferido: botocore/boto3 son la parte lenta del arranque
+            from modules.data_proxy import DataProxy
+            self.data_proxy = DataProxy()
+            if self.stream_arn:
+                self.change_stream = ChangeStreamConsumer(
+                    DynamoDBStreamSource(self.stream_arn), self.subject, DecimalEncoder)
+            if self.change_stream:
+                self.change_stream.start()
+            print("--- Backend DynamoDB listo ---")
+        except BaseException as e:  # DataProxy hace sys.exit(1) si falla
+            self._startup_error = e
+        finally:
+            self._backend_ready.set()
+
+    def is_ready(self):
+        return self._backend_ready.is_set() and self.data_proxy is not None
+
+    def _wait_backend(self):
+        """Bloquea el pedido hasta que termine el warm-up. False si falló."""
+        self._backend_ready.wait()
+        return self.data_proxy is not None
+
+    def _toggle_tracing(self, data):
+        """Acción 'trace': {"ENABLE": true|false}. Escribe en self.trace_file."""
+        if data.get("ENABLE", True):
+            tracer.enable(self.trace_file)
+        else:
+            tracer.disable()
+        return {"status": "OK", "trace": tracer.enabled, "file": self.trace_file}, 200
+
+    def _toggle_profiler(self, data):
+        """Acción 'profile': al apagarlo se vuelcan las pilas en self.profile_file."""
+        if data.get("ENABLE", True):
+            profiler.start()
+            return {"status": "OK", "profile": True}, 200
+        samples = profiler.stop(self.profile_file)
+        return {"status": "OK", "profile": False, "file": self.profile_file,
+                "samples": samples}, 200
+
+    def _publish(self, action, item):
+        """Notifica a los observadores un cambio originado en este servidor."""
+        if self.change_stream:
+            # Evita re-notificar el mismo cambio cuando llegue por el stream
+            self.change_stream.remember(item)
+        self.subject.notify({"action": action, "data": item}, DecimalEncoder)
+
+    def _send_response(self, conn, data, status_code=200, framed=False):
+        """Helper para enviar respuestas JSON.
+
+        framed=True envía una sola línea terminada en '\\n', como las
+        notificaciones, para conexiones que siguen abiertas (suscriptores).
+        """
         print(f"Enviando respuesta (Status: {status_code})")
-        conn.sendall(json.dumps(data, cls=DecimalEncoder,
-                     indent=4).encode('utf-8'))
+        with tracer.span("send_response"):
+            if framed:
+                conn.sendall(json.dumps(data, cls=DecimalEncoder).encode('utf-8') + b"\n")
+            else:
+                conn.sendall(json.dumps(data, cls=DecimalEncoder,
+                             indent=4).encode('utf-8'))
 
     def handle_client_connection(self, conn, addr):
         print(
@@ -47,9 +115,32 @@ class Server:
             action = data.get("ACTION")
             client_uuid = data.get("UUID", "UUID_DESCONOCIDO")
             session_id = str(uuid.uuid4())
+            # El session_id (sessionid en la auditoría) es el trace ID del pedido
+            tracer.begin(session_id)
 
             # --- LÓGICA DE ACCIONES Y NOTIFICACIÓN ---
-            if action == "get":
+            if action == "status":
+                # No espera al backend: es la señal de disponibilidad
+                resp_data, status = {"status": "OK", "ready": self.is_ready(),
+                                     "version": VERSION}, 200
+
+            elif action == "subscribers":
+                # Introspección: suscriptores por shard y estadísticas por UUID
+                resp_data, status = self.subject.stats(), 200
+
+            elif not self._wait_backend():
+                resp_data, status = {"error": "Backend no disponible"}, 503
+
+            elif action in ("trace", "profile"):
+                # Acciones de administración: escriben archivos en el servidor,
+                # así que quedan auditadas como cualquier otro cambio de estado
+                enable = bool(data.get("ENABLE", True))
+                self.data_proxy._log_action(
+                    client_uuid, session_id, action, f"ENABLE: {enable}")
+                toggle = self._toggle_tracing if action == "trace" else self._toggle_profiler
+                resp_data, status = toggle(data)
+
+            elif action == "get":
                 item_id = data.get("id") or data.get("ID")
                 if item_id:
                     resp_data, status = self.data_proxy.get_item(
@@ -66,9 +157,18 @@ class Server:
                     )
                     # SOLO ACÁ notificamos porque es una actualización de datos
                     if status == 200:
-                        self.subject.notify(
-                            {"action": action, "data": resp_data}, DecimalEncoder
-                        )
+                        self._publish(action, resp_data)
+                else:
+                    resp_data, status = {"error": "Missing ID"}, 400
+
+            elif action == "update":
+                # Actualización parcial (UpdateItem): solo los campos enviados
+                if "id" in data or "ID" in data:
+                    resp_data, status = self.data_proxy.update_item(
+                        data, client_uuid, session_id
+                    )
+                    if status == 200:
+                        self._publish(action, resp_data)
                 else:
                     resp_data, status = {"error": "Missing ID"}, 400
 
@@ -86,18 +186,30 @@ class Server:
             elif action == "subscribe":
                 self.data_proxy._log_action(
                     client_uuid, session_id, "subscribe")
-                self.subject.subscribe(conn, client_uuid)
-                is_subscriber = True
-                resp_data, status = {"status": "OK",
-                                     "message": "Suscrito"}, 200
+                # "IDS" (opcional): solo se notifican cambios de esos ids.
+                # Se valida antes de confirmar la suscripción.
+                filters = data.get("IDS")
+                if isinstance(filters, str):
+                    filters = [filters]
+                if filters is not None and not (
+                        isinstance(filters, list) and all(isinstance(i, str) for i in filters)):
+                    resp_data, status = {"error": "IDS debe ser un string o una lista de strings"}, 400
+                else:
+                    # Se suscribe recién después de enviar el OK (ver abajo) para
+                    # que ninguna notificación llegue antes que la confirmación
+                    is_subscriber = True
+                    resp_data, status = {"status": "OK",
+                                         "message": "Suscrito"}, 200
 
             else:
                 resp_data, status = {"error": "Unknown Action"}, 400
 
-            # Respuesta centralizada
-            self._send_response(conn, resp_data, status)
+            # Respuesta centralizada. Toda respuesta a 'subscribe' (también los
+            # errores) va enmarcada: el observador la lee con FrameReader
+            self._send_response(conn, resp_data, status, framed=action == "subscribe")
 
             if is_subscriber:
+                self.subject.subscribe(conn, client_uuid, filters)
                 print(
                     f"Cliente {addr} (UUID: {client_uuid}) suscrito. Hilo en espera.")
                 while conn.recv(1024):  # Esperar desconexión
@@ -112,6 +224,7 @@ class Server:
         finally:
             if is_subscriber:
                 self.subject.unsubscribe(conn)
+            tracer.end()
             print(f"Cerrando conexión y finalizando hilo para {addr}.")
             conn.close()
 
@@ -128,8 +241,12 @@ class Server:
 
             self.server_socket.listen(5)
             print(f"Servidor {VERSION} escuchando en {self.host}:{self.port}")
+            threading.Thread(target=self._warm_up, name="warm-up", daemon=True).start()
 
             while True:
+                if self._startup_error is not None:
+                    # Igual que antes: sin DynamoDB el servidor no puede funcionar
+                    sys.exit(1)
                 # El accept() ahora está envuelto en un try/except para el timeout
                 try:
                     conn, addr = self.server_socket.accept()
@@ -150,6 +267,9 @@ class Server:
         except KeyboardInterrupt:
             print("\nCerrando el servidor...")
         finally:
+            if self.change_stream:
+                self.change_stream.stop()
+            self.subject.close()
             if hasattr(self, 'server_socket') and self.server_socket:
                 self.server_socket.close()
             print("Servidor detenido.")
@@ -159,5 +279,26 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Servidor TPFI")
     parser.add_argument('-p', '--port', type=int,
                         default=8080, help='Puerto (default: 8080)')
+    parser.add_argument('--stream-arn',
+                        help='(Opcional) ARN de DynamoDB Streams de CorporateData para notificar cambios externos')
+    parser.add_argument('--trace', action='store_true',
+                        help='Activa las trazas por pedido desde el arranque')
+    parser.add_argument('--trace-file', default='trace.json',
+                        help='Archivo de trazas (Chrome Trace Event, default: trace.json)')
+    parser.add_argument('--profile-file', default='profile.folded',
+                        help='Archivo del profiler (pilas folded, default: profile.folded)')
+    parser.add_argument('--batch-window', type=int, default=0,
+                        help='(Opcional) Agrupa notificaciones cada N ms, solo la última versión por id')
+    parser.add_argument('--max-rate', type=float,
+                        help='(Opcional, con --batch-window) Máximo de mensajes por segundo por suscriptor')
     args = parser.parse_args()
-    Server('0.0.0.0', args.port).start()
+    if args.batch_window < 0:
+        parser.error("--batch-window no puede ser negativo")
+    if args.max_rate is not None and not args.batch_window:
+        parser.error("--max-rate requiere --batch-window")
+    if args.max_rate is not None and args.max_rate <= 0:
+        parser.error("--max-rate debe ser mayor que 0")
+    if args.trace:
+        tracer.enable(args.trace_file)
+    Server('0.0.0.0', args.port, None, args.trace_file, args.profile_file,
+           args.batch_window / 1000 or None, args.max_rate, args.stream_arn).start()
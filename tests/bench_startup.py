@@ -0,0 +1,81 @@
+# tests/bench_startup.py
+# Benchmark de arranque: costo de import de los clientes y tiempo hasta que
+# el servidor acepta conexiones / tiene el backend listo.
+# Uso: python tests/bench_startup.py [-n 20] [-p 8082]
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, 'src')
+SERVER = os.path.join(SRC, 'singletonproxyobserver.py')
+
+
+def time_import(module, runs):
+    """Mediana (ms) de 'python -c import <module>' en un intérprete nuevo."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', f'import {module}'], cwd=SRC, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def status(port):
+    with socket.create_connection(('localhost', port), timeout=1) as sock:
+        sock.sendall(json.dumps({"ACTION": "status"}).encode('utf-8'))
+        raw = b"".join(iter(lambda: sock.recv(1024), b""))
+    return json.loads(raw.decode('utf-8'))
+
+
+def time_server(port, timeout=30):
+    """Devuelve (ms hasta aceptar conexiones, ms hasta backend listo o None)."""
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, SERVER, '-p', str(port)],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    listening = ready = None
+    try:
+        while time.perf_counter() - start < timeout and proc.poll() is None:
+            try:
+                resp = status(port)
+            except (OSError, ValueError):
+                time.sleep(0.005)
+                continue
+            now = (time.perf_counter() - start) * 1000
+            listening = listening or now
+            if resp.get("ready"):
+                ready = now
+                break
+            time.sleep(0.005)
+        if listening is None and proc.poll() is not None:
+            # Terminó sin escuchar (p. ej. sin AWS, en versiones que cargan
+            # las tablas antes del bind): se informa cuánto tardó en fallar
+            print(f"Servidor terminó sin escuchar: {(time.perf_counter() - start) * 1000:8.1f} ms")
+    finally:
+        proc.terminate()
+        proc.wait()
+    return listening, ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque TPFI")
+    parser.add_argument('-n', '--runs', type=int, default=10, help='Repeticiones')
+    parser.add_argument('-p', '--port', type=int, default=8082, help='Puerto para el servidor')
+    args = parser.parse_args()
+
+    print(f"Python vacío:          {time_import('sys', args.runs):8.1f} ms")
+    for module in ('singletonclient', 'observerclient', 'singletonproxyobserver'):
+        print(f"import {module:22} {time_import(module, args.runs):8.1f} ms")
+
+    listening, ready = time_server(args.port)
+    print(f"Servidor escuchando:   {listening:8.1f} ms" if listening else "Servidor escuchando:   no")
+    print(f"Backend listo:         {ready:8.1f} ms" if ready else "Backend listo:         no (¿credenciales AWS?)")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,7 @@ import os
 import sys
 import time
 import json
+import socket
 import boto3
 from botocore.exceptions import ClientError
 
@@ -16,6 +17,8 @@ PORT = 8081
 JSON_GET = os.path.join(ROOT, 'data', 'test_get.json')
 JSON_SET = os.path.join(ROOT, 'data', 'test_set.json')
 JSON_LIST = os.path.join(ROOT, 'data', 'test_list.json')
+JSON_UPDATE = os.path.join(ROOT, 'data', 'test_update.json')
+NDJSON_BATCH = os.path.join(ROOT, 'data', 'test_batch.ndjson')
 
 
 class TestAcceptance(unittest.TestCase):
@@ -43,9 +46,27 @@ class TestAcceptance(unittest.TestCase):
             [sys.executable, SERVER, '-p', str(port)],
             text=True
         )
-        time.sleep(1.5)
+        if not self.wait_until_ready(port):
+            self.fail("El servidor no quedó listo a tiempo.")
         print("Servidor iniciado.")
 
+    def wait_until_ready(self, port=PORT, timeout=15):
+        """Consulta la acción 'status' hasta que el backend esté listo."""
+        start_time = time.time()
+        while time.time() - start_time < timeout:
+            if self.server_process.poll() is not None:
+                return False  # El servidor terminó (p. ej. sin AWS)
+            try:
+                with socket.create_connection(('localhost', port), timeout=1) as sock:
+                    sock.sendall(json.dumps({"ACTION": "status"}).encode('utf-8'))
+                    raw = b"".join(iter(lambda: sock.recv(1024), b""))
+                if json.loads(raw.decode('utf-8')).get("ready"):
+                    return True
+            except (OSError, ValueError):
+                pass  # Todavía no escucha
+            time.sleep(0.05)
+        return False
+
     def stop_server(self):
         if self.server_process:
             self.server_process.terminate()
@@ -203,6 +224,70 @@ class TestAcceptance(unittest.TestCase):
         print("Error de Socket capturado correctamente.")
         print("--- Test 05 Superado ---")
 
+    def test_06_update_parcial_y_conflicto_de_version(self):
+        print("\n--- Test 06: UPDATE parcial y conflicto de versión ---")
+        self.start_server()
+        self.assertEqual(self.run_client(['-i', JSON_SET, '-p', str(PORT)]).returncode, 0)
+
+        res_upd = self.run_client(['-i', JSON_UPDATE, '-p', str(PORT)])
+        print(res_upd.stdout)
+        self.assertEqual(res_upd.returncode, 0)
+        self.assertIn("ACTUALIZADO", res_upd.stdout)
+        self.assertIn('"version"', res_upd.stdout)
+
+        # version 0 = "crear solo si no existe": el registro ya existe
+        temp_json = os.path.join(ROOT, 'data', 'temp_version.json')
+        with open(temp_json, 'w') as f:
+            json.dump({"ACTION": "set", "id": "MateosPrueba2", "version": 0}, f)
+        res = self.run_client(['-i', temp_json, '-p', str(PORT)])
+        print(res.stdout)
+        os.remove(temp_json)
+        self.assertEqual(res.returncode, 0)
+        self.assertIn("Version conflict", res.stdout)
+        print("--- Test 06 Superado ---")
+
+    def test_07_modo_batch(self):
+        print("\n--- Test 07: Modo batch (NDJSON, varios pedidos) ---")
+        self.start_server()
+        out_file = os.path.join(ROOT, 'data', 'temp_batch_out.ndjson')
+        res = self.run_client(['-b', '-i', NDJSON_BATCH, '-o', out_file, '-p', str(PORT)])
+        print(res.stdout)
+        print(res.stderr)
+        self.assertEqual(res.returncode, 0)
+        self.assertIn("Resumen del Batch", res.stdout)
+
+        with open(out_file) as f:
+            results = [json.loads(line) for line in f]
+        os.remove(out_file)
+        self.assertEqual([r["index"] for r in results], [0, 1, 2, 3])
+        self.assertEqual(results[0]["status"], "OK")
+        self.assertEqual(results[1]["status"], "ERROR")  # get sin ID
+        print("--- Test 07 Superado ---")
+
+
+    def test_08_set_sin_version_reemplaza_el_registro(self):
+        print("\n--- Test 08: SET sin versión reemplaza el registro completo ---")
+        self.start_server()
+        self.assertEqual(self.run_client(['-i', JSON_SET, '-p', str(PORT)]).returncode, 0)
+
+        temp_json = os.path.join(ROOT, 'data', 'temp_replace.json')
+        with open(temp_json, 'w') as f:
+            json.dump({"ACTION": "set", "id": "MateosPrueba2", "cp": "3260"}, f)
+        res_set = self.run_client(['-i', temp_json, '-p', str(PORT)])
+        os.remove(temp_json)
+        self.assertEqual(res_set.returncode, 0)
+        self.assertIn('"version"', res_set.stdout)
+
+        temp_get = os.path.join(ROOT, 'data', 'temp_get.json')
+        with open(temp_get, 'w') as f:
+            json.dump({"ACTION": "get", "id": "MateosPrueba2"}, f)
+        res_get = self.run_client(['-i', temp_get, '-p', str(PORT)])
+        os.remove(temp_get)
+        print(res_get.stdout)
+        self.assertIn('"cp"', res_get.stdout)
+        self.assertNotIn('"sede"', res_get.stdout)  # Campo omitido: ya no existe
+        print("--- Test 08 Superado ---")
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+import os
+import sys
+import json
+import socket
+from decimal import Decimal
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from modules.observer import Subject
+from modules.change_stream import ChangeStreamConsumer, DynamoDBStreamSource, LocalStreamSource
+
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, obj):
+        return str(obj) if isinstance(obj, Decimal) else super().default(obj)
+
+
+class FakeStreamsClient:
+    """Cliente 'dynamodbstreams' mínimo: shards con registros y fallas programadas."""
+
+    def __init__(self, pages):
+        self.pages = pages          # Páginas de describe_stream (listas de shard ids)
+        self.records = {}           # shard_id -> registros pendientes
+        self.fail = set()           # shard ids cuyo get_records falla una vez
+        self.iterator_types = {}
+
+    def describe_stream(self, StreamArn, ExclusiveStartShardId=None):
+        index = 0 if ExclusiveStartShardId is None else next(
+            i + 1 for i, page in enumerate(self.pages) if page[-1] == ExclusiveStartShardId)
+        desc = {"Shards": [{"ShardId": s} for s in self.pages[index]]}
+        if index + 1 < len(self.pages):
+            desc["LastEvaluatedShardId"] = self.pages[index][-1]
+        return {"StreamDescription": desc}
+
+    def get_shard_iterator(self, StreamArn, ShardId, ShardIteratorType, **kwargs):
+        self.iterator_types[ShardId] = ShardIteratorType
+        return {"ShardIterator": ShardId}
+
+    def get_records(self, ShardIterator, Limit):
+        if ShardIterator in self.fail:
+            self.fail.discard(ShardIterator)
+            raise RuntimeError("ProvisionedThroughputExceededException")
+        records, self.records[ShardIterator] = self.records.get(ShardIterator, []), []
+        return {"Records": records, "NextShardIterator": ShardIterator}
+
+
+def stream_record(item_id, seq):
+    return {"eventName": "MODIFY",
+            "dynamodb": {"NewImage": {"id": {"S": item_id}}, "SequenceNumber": seq}}
+
+
+class PlainDeserializer:
+    def deserialize(self, value):
+        return value["S"]
+
+
+def fake_source(client):
+    source = DynamoDBStreamSource.__new__(DynamoDBStreamSource)  # Sin boto3
+    source.stream_arn = "arn:test"
+    source._client = client
+    source._deserializer = PlainDeserializer()
+    source._iterators, source._last_seq, source._started = {}, {}, False
+    return source
+
+
+class TestDynamoDBStreamSource(unittest.TestCase):
+
+    def test_01_falla_en_un_shard_no_pierde_los_otros(self):
+        client = FakeStreamsClient([["s1", "s2"]])
+        source = fake_source(client)
+        source.read()
+        client.records["s1"] = [stream_record("A", "1")]
+        client.records["s2"] = [stream_record("B", "1")]
+        client.fail.add("s2")
+        self.assertEqual([r["item"]["id"] for r in source.read()], ["A"])
+        self.assertEqual([r["item"]["id"] for r in source.read()], ["B"])
+
+    def test_02_shards_nuevos_desde_el_inicio_y_paginado(self):
+        client = FakeStreamsClient([["s1"], ["s2"]])
+        source = fake_source(client)
+        source.read()
+        self.assertEqual(client.iterator_types, {"s1": "LATEST", "s2": "LATEST"})
+        client.pages[1].append("s3")
+        client.records["s3"] = [stream_record("C", "1")]
+        self.assertEqual([r["item"]["id"] for r in source.read()], ["C"])
+        self.assertEqual(client.iterator_types["s3"], "TRIM_HORIZON")
+
+
+class TestChangeStream(unittest.TestCase):
+
+    def setUp(self):
+        self.subject = Subject()
+        self.server_side, self.client_side = socket.socketpair()
+        self.client_side.settimeout(2)
+        self.subject.subscribe(self.server_side, "TEST-STREAM")
+        self.source = LocalStreamSource()
+        self.consumer = ChangeStreamConsumer(self.source, self.subject, DecimalEncoder)
+
+    def tearDown(self):
+        self.server_side.close()
+        self.client_side.close()
+
+    def test_01_cambio_externo_notifica(self):
+        self.source.put_record({"id": "EXT-1", "version": Decimal(3), "sede": "Externa"})
+        self.assertEqual(self.consumer.poll_once(), 1)
+        event = json.loads(self.client_side.recv(4096).decode('utf-8'))
+        self.assertEqual(event["EVENT"], "update")
+        self.assertEqual(event["DATA"]["data"]["id"], "EXT-1")
+        self.assertEqual(event["DATA"]["data"]["version"], "3")
+
+    def test_02_cambio_local_no_se_duplica(self):
+        self.consumer.remember({"id": "LOC-1", "version": 2})
+        self.source.put_record({"id": "LOC-1", "version": Decimal(2)})
+        self.source.put_record({"id": "LOC-1", "version": Decimal(3)})
+        self.assertEqual(self.consumer.poll_once(), 1)
+
+    def test_03_remove_siempre_se_publica(self):
+        self.consumer.remember({"id": "DEL-1"})
+        self.source.put_record({"id": "DEL-1"}, event_name="REMOVE")
+        self.assertEqual(self.consumer.poll_once(), 1)
+        event = json.loads(self.client_side.recv(4096).decode('utf-8'))
+        self.assertEqual(event["DATA"]["action"], "delete")
+
+    def test_04_escrituras_externas_sin_version_no_se_descartan(self):
+        for sede in ("A", "B", "C"):
+            self.source.put_record({"id": "EXT-2", "sede": sede})
+            self.assertEqual(self.consumer.poll_once(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import os
+import sys
+import json
+import socket
+import threading
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from modules.framing import FrameReader, recv_until_close
+
+
+class TestFraming(unittest.TestCase):
+
+    def setUp(self):
+        self.writer, self.reader_sock = socket.socketpair()
+        self.reader_sock.settimeout(2)
+
+    def tearDown(self):
+        self.writer.close()
+        self.reader_sock.close()
+
+    def test_01_varios_mensajes_en_un_envio(self):
+        self.writer.sendall(b'{"n": 1}\n{"n": 2}\n{"n"')
+        self.writer.sendall(b': 3}\n')
+        reader = FrameReader(self.reader_sock)
+        self.assertEqual([json.loads(reader.read_frame())["n"] for _ in range(3)], [1, 2, 3])
+
+    def test_02_mensaje_mas_grande_que_el_buffer(self):
+        big = json.dumps({"data": "x" * 50000}).encode('utf-8')
+        sender = threading.Thread(target=self.writer.sendall, args=(big + b"\n" + b'{"n": 2}\n',))
+        sender.start()
+        reader = FrameReader(self.reader_sock, bufsize=1024)
+        self.assertEqual(reader.read_frame(), big)
+        self.assertEqual(json.loads(reader.read_frame()), {"n": 2})
+        sender.join()
+
+    def test_03_cierre_del_servidor(self):
+        self.writer.sendall(b'{"n": 1}\n')
+        self.writer.close()
+        reader = FrameReader(self.reader_sock)
+        self.assertEqual(json.loads(reader.read_frame()), {"n": 1})
+        with self.assertRaises(ConnectionError):
+            reader.read_frame()
+
+    def test_04_recv_until_close(self):
+        payload = b"y" * 200000
+        sender = threading.Thread(target=lambda: (self.writer.sendall(payload), self.writer.close()))
+        sender.start()
+        out = bytearray()
+        self.assertEqual(recv_until_close(self.reader_sock, out.extend, bufsize=4096), len(payload))
+        self.assertEqual(bytes(out), payload)
+        sender.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+import os
+import sys
+import json
+import socket
+from decimal import Decimal
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from modules.observer import Subject
+from modules.framing import FrameReader
+
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, obj):
+        return str(obj) if isinstance(obj, Decimal) else super().default(obj)
+
+
+def update(item_id, version, **fields):
+    return {"action": "set", "data": dict(id=item_id, version=Decimal(version), **fields)}
+
+
+class TestObserver(unittest.TestCase):
+
+    def setUp(self):
+        self.pairs = []
+
+    def tearDown(self):
+        for server_side, client_side in self.pairs:
+            server_side.close()
+            client_side.close()
+
+    def connect(self, subject, client_uuid="TEST-OBS", filters=None):
+        server_side, client_side = socket.socketpair()
+        client_side.settimeout(2)
+        self.pairs.append((server_side, client_side))
+        subject.subscribe(server_side, client_uuid, filters)
+        return FrameReader(client_side)
+
+    def test_01_batch_conserva_ultima_version_por_id(self):
+        # Ventana larga: el hilo no interfiere, se llama a flush() a mano
+        subject = Subject(batch_window=60)
+        reader = self.connect(subject)
+        subject.notify(update("A", 1, sede="uno"), DecimalEncoder)
+        subject.notify(update("B", 1), DecimalEncoder)
+        subject.notify(update("A", 3, sede="tres"), DecimalEncoder)
+        subject.notify(update("A", 2, sede="vieja"), DecimalEncoder)  # Llega tarde
+        subject.flush()
+
+        event = json.loads(reader.read_frame())
+        self.assertEqual(event["EVENT"], "batch")
+        by_id = {d["data"]["id"]: d["data"] for d in event["DATA"]}
+        self.assertEqual(set(by_id), {"A", "B"})
+        self.assertEqual(by_id["A"]["sede"], "tres")
+        subject.close()
+
+    def test_02_limite_de_tasa_por_suscriptor(self):
+        subject = Subject(batch_window=60, max_rate=0.001)
+        reader = self.connect(subject)
+        subject.notify(update("A", 1), DecimalEncoder)
+        subject.flush()
+        self.assertEqual(len(json.loads(reader.read_frame())["DATA"]), 1)
+
+        # Sin tokens: se acumula en el pendiente del suscriptor
+        subject.notify(update("A", 2), DecimalEncoder)
+        subject.flush()
+        subject.notify(update("A", 3), DecimalEncoder)
+        subject.flush()
+        reader._sock.settimeout(0.1)
+        with self.assertRaises(socket.timeout):
+            reader.read_frame()
+
+        sub = subject.registry.snapshot()[0]
+        self.assertEqual(sub.backlog["A"]["data"]["version"], Decimal(3))
+        self.assertEqual(subject.stats()["by_uuid"]["TEST-OBS"]["throttled"], 2)
+        subject.flush()  # Ventana sin cambios nuevos: no suma
+        self.assertEqual(subject.stats()["by_uuid"]["TEST-OBS"]["throttled"], 2)
+        subject.close()
+
+    def test_03_suscriptor_caido_se_elimina(self):
+        subject = Subject()
+        self.connect(subject)
+        self.pairs[0][1].close()
+        subject.notify(update("A", 1), DecimalEncoder)
+        subject.notify(update("A", 2), DecimalEncoder)
+        self.assertEqual(len(subject.registry), 0)
+
+    def test_04_filtro_por_ids(self):
+        subject = Subject()
+        todos = self.connect(subject, "TODOS")
+        solo_b = self.connect(subject, "SOLO-B", filters=["B"])
+        subject.notify(update("A", 1), DecimalEncoder)
+        subject.notify(update("B", 1), DecimalEncoder)
+        self.assertEqual(json.loads(todos.read_frame())["DATA"]["data"]["id"], "A")
+        self.assertEqual(json.loads(solo_b.read_frame())["DATA"]["data"]["id"], "B")
+
+    def test_05_registro_y_estadisticas(self):
+        subject = Subject(shards=4)
+        for i in range(10):
+            self.connect(subject, f"UUID-{i % 3}")
+        subject.subscribe(self.pairs[0][0], "UUID-0")  # Duplicado: se ignora
+        stats = subject.stats()
+        self.assertEqual(stats["total"], 10)
+        self.assertEqual(sum(stats["shards"]), 10)
+        self.assertEqual(stats["by_uuid"]["UUID-0"]["connections"], 4)
+
+        subject.notify(update("A", 1), DecimalEncoder)
+        self.assertEqual(subject.stats()["by_uuid"]["UUID-1"]["sent"], 3)
+        for server_side, _ in self.pairs:
+            subject.unsubscribe(server_side)
+        self.assertEqual(len(subject.registry), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,6 +5,7 @@ import os
 import sys
 import time
 import json
+import socket
 import boto3
 from botocore.exceptions import ClientError
 
@@ -43,9 +44,27 @@ class TestAcceptance(unittest.TestCase):
             [sys.executable, SERVER, '-p', str(port)],
             text=True
         )
-        time.sleep(1.5)
+        if not self.wait_until_ready(port):
+            self.fail("El servidor no quedó listo a tiempo.")
         print("Servidor iniciado.")
 
+    def wait_until_ready(self, port=PORT, timeout=15):
+        """Consulta la acción 'status' hasta que el backend esté listo."""
+        start_time = time.time()
+        while time.time() - start_time < timeout:
+            if self.server_process.poll() is not None:
+                return False  # El servidor terminó (p. ej. sin AWS)
+            try:
+                with socket.create_connection(('localhost', port), timeout=1) as sock:
+                    sock.sendall(json.dumps({"ACTION": "status"}).encode('utf-8'))
+                    raw = b"".join(iter(lambda: sock.recv(1024), b""))
+                if json.loads(raw.decode('utf-8')).get("ready"):
+                    return True
+            except (OSError, ValueError):
+                pass  # Todavía no escucha
+            time.sleep(0.05)
+        return False
+
     def stop_server(self):
         if self.server_process:
             self.server_process.terminate()
@@ -0,0 +1,62 @@
+import unittest
+import os
+import sys
+import json
+import time
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from modules.tracing import Tracer, SamplingProfiler
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_01_traza_apagada_no_escribe(self):
+        tracer = Tracer()
+        self.assertIs(tracer.span("a"), tracer.span("b"))  # Mismo span nulo
+        with tracer.span("audit.put_item"):
+            pass
+
+    def test_02_spans_en_formato_chrome(self):
+        path = os.path.join(self.tmpdir.name, 'trace.json')
+        tracer = Tracer()
+        tracer.enable(path)
+        tracer.begin("sesion-123")
+        with tracer.span("data.put_item"):
+            time.sleep(0.001)
+        tracer.end()
+        tracer.disable()
+
+        with open(path) as f:
+            content = f.read()
+        events = json.loads(content.rstrip().rstrip(',') + "]")
+        self.assertEqual(events[0]["name"], "data.put_item")
+        self.assertEqual(events[0]["ph"], "X")
+        self.assertEqual(events[0]["args"]["trace_id"], "sesion-123")
+        self.assertGreaterEqual(events[0]["dur"], 1000)
+
+    def test_03_profiler_por_muestreo(self):
+        path = os.path.join(self.tmpdir.name, 'profile.folded')
+        profiler = SamplingProfiler(interval=0.001)
+        self.assertTrue(profiler.start())
+        deadline = time.time() + 0.1
+        while time.time() < deadline:
+            sum(range(1000))
+        samples = profiler.stop(path)
+        self.assertGreater(samples, 0)
+        with open(path) as f:
+            line = f.readline()
+        stack, count = line.rsplit(" ", 1)
+        self.assertIn("test_tracing.py:test_03_profiler_por_muestreo", stack)
+
+
+if __name__ == '__main__':
+    unittest.main()